@@ -1,11 +1,17 @@
 import sqlite3
-import pandas as pd
 import os
+import logging
+import pyarrow as pa
+import pyarrow.csv as pacsv
 
 BASE_DIR = r"C:\Users\welcome\Desktop\Sales_Analytics_Project"
 DB_PATH = os.path.join(BASE_DIR, "outputs", "sales_analytics.db")
 EXPORT_DIR = os.path.join(BASE_DIR, "exports")
 
+# progress messages go through logging; set SALES_LOG=INFO to see them
+logging.basicConfig(level=os.environ.get("SALES_LOG", "WARNING").upper(), format="%(levelname)s: %(message)s")
+log = logging.getLogger("sales")
+
 # Ensure exports folder exists
 if os.path.exists(EXPORT_DIR):
     if not os.path.isdir(EXPORT_DIR):
@@ -23,14 +29,58 @@ tables = [
     "sa_monthly_sales"
 ]
 
-conn = sqlite3.connect(DB_PATH)
+# rows fetched per round-trip when streaming a table to CSV
+FETCH_SIZE = 10000
+
+# SQLite columns are dynamically typed, so the Arrow type is inferred from the
+# values of the first batch and later batches are cast to it; safe=True raises
+# instead of silently truncating (e.g. a REAL landing in an int64 column)
+def arrow_column(values, field_type=None):
+    try:
+        arr = pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # numbers and text mixed in one column: write them as text, as csv.writer did
+        arr = pa.array([None if v is None else str(v) for v in values], type=pa.string())
+    if field_type is None:
+        # an all-NULL first batch gives no type to go on; text can hold anything
+        return arr.cast(pa.string()) if pa.types.is_null(arr.type) else arr
+    return arr.cast(field_type, safe=True)
+
+# keep the platform line ending, as df.to_csv did
+write_options = pacsv.WriteOptions(eol=os.linesep)
 
+def export(table):
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-200000")
+    try:
+        log.info("Exporting: %s", table)
+        output_path = os.path.join(EXPORT_DIR, f"{table}.csv")
+        # stream row batches from SQLite into Arrow's C++ CSV writer
+        cur = conn.cursor()
+        cur.execute(f"SELECT * FROM {table}")
+        names = [d[0] for d in cur.description]
+        rows = cur.fetchmany(FETCH_SIZE)
+        # the schema comes from the first batch; an empty table still gets a header
+        first = [arrow_column(col) for col in zip(*rows)] if rows else None
+        if first:
+            schema = pa.schema([(name, col.type) for name, col in zip(names, first)])
+        else:
+            schema = pa.schema([(name, pa.string()) for name in names])
+        with pacsv.CSVWriter(output_path, schema, write_options=write_options) as writer:
+            while rows:
+                columns = first or [arrow_column(col, field.type) for col, field in zip(zip(*rows), schema)]
+                first = None
+                writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+                rows = cur.fetchmany(FETCH_SIZE)
+        cur.close()
+        log.info("Saved: %s", output_path)
+    finally:
+        conn.close()
+
+# tables are exported one after another: most of export() is Python-level
+# batch conversion that holds the GIL, so a thread pool measured no faster
 for table in tables:
-    print("Exporting:", table)
-    df = pd.read_sql_query(f"SELECT * FROM {table}", conn)
-    output_path = os.path.join(EXPORT_DIR, f"{table}.csv")
-    df.to_csv(output_path, index=False)
-    print("Saved:", output_path)
-
-conn.close()
-print("All tables exported successfully.")
+    export(table)
+
+log.info("All tables exported successfully.")
@@ -4,7 +4,9 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from sqlalchemy import create_engine
+import sqlite3
+import logging
+import os
 from pathlib import Path
 import sys
 
@@ -16,34 +18,48 @@ OUTPUT_DIR = Path("outputs")
 DB_PATH = OUTPUT_DIR / "sales_analytics.db"
 TABLE_PREFIX = "sa_"
 
+# progress messages go through logging; set SALES_LOG=INFO to see them
+logging.basicConfig(level=os.environ.get("SALES_LOG", "WARNING").upper(), format="%(levelname)s: %(message)s")
+log = logging.getLogger("sales")
+
 # ensure outputs folder exists
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 if not DATA_PATH.exists():
-    print(f"ERROR: Data file not found: {DATA_PATH.resolve()}")
+    log.error("Data file not found: %s", DATA_PATH.resolve())
     sys.exit(1)
 
 # ==============
-# 1. LOAD RAW DATA (Excel .xls)
-# ==============
-# use xlrd engine for .xls files
-print("Reading Excel file:", DATA_PATH)
-df = pd.read_excel(DATA_PATH, engine="xlrd")
-
-print("Raw shape:", df.shape)
-print("Columns:", df.columns.tolist())
-
-# ==============
-# 1.1 Normalize column names to safe snake_case (lowercase)
+# 1. LOAD RAW DATA (Excel .xls, cached as Parquet)
 # ==============
+# Normalize column names to safe snake_case (lowercase)
 def normalize_cols(cols):
     return [
         str(c).strip().lower().replace(" ", "_").replace("-", "_")
         for c in cols
     ]
 
-df.columns = normalize_cols(df.columns)
-print("Normalized columns:", df.columns.tolist())
+# Parsing the .xls is the slowest step of the whole run, so the
+# normalized frame is cached as Parquet and reused until the .xls changes.
+PARQUET_CACHE = OUTPUT_DIR / "superstore.parquet"
+
+def load_source():
+    if PARQUET_CACHE.exists() and PARQUET_CACHE.stat().st_mtime >= DATA_PATH.stat().st_mtime:
+        log.info("Reading Parquet cache: %s", PARQUET_CACHE)
+        return pd.read_parquet(PARQUET_CACHE, engine="pyarrow")
+    # calamine (Rust) reads .xls much faster than xlrd; needs pandas >= 2.2
+    # and the python-calamine package
+    log.info("Reading Excel file: %s", DATA_PATH)
+    raw = pd.read_excel(DATA_PATH, engine="calamine")
+    raw.columns = normalize_cols(raw.columns)
+    raw.to_parquet(PARQUET_CACHE, engine="pyarrow", compression="zstd", index=False)
+    log.info("Wrote Parquet cache: %s", PARQUET_CACHE)
+    return raw
+
+df = load_source()
+
+log.info("Raw shape: %s", df.shape)
+log.info("Normalized columns: %s", df.columns.tolist())
 
 # Helpful: show mapping of typical expected columns vs available
 expected_candidates = {
@@ -70,56 +86,34 @@ expected_candidates = {
 }
 
 # create a mapping from expected -> actual column in df (if present)
-col_map = {}
-for logical, candidates in expected_candidates.items():
-    found = None
-    for c in candidates:
-        if c in df.columns:
-            found = c
-            break
-    col_map[logical] = found
-
-print("Detected column map (logical -> actual):")
+colset = set(df.columns)
+col_map = {
+    logical: next((c for c in candidates if c in colset), None)
+    for logical, candidates in expected_candidates.items()
+}
+
+log.info("Detected column map (logical -> actual):")
 for k, v in col_map.items():
-    print(f"  {k:12} -> {v}")
+    log.info("  %-12s -> %s", k, v)
 
 # ==============
 # 2. Keep / rename the columns we will use (if they exist)
 # ==============
-# Build a working DataFrame that contains at least the columns we need, copying from df if present.
-work = pd.DataFrame()
-
-# helper to copy column if exists, else fill NaN
-def copy_col(logical_name, target_name=None):
-    actual = col_map.get(logical_name)
-    if target_name is None:
-        target_name = logical_name
-    if actual is not None:
-        work[target_name] = df[actual].copy()
-    else:
-        work[target_name] = np.nan
-
-# copy important fields
-copy_col('order_id')
-copy_col('order_date')
-copy_col('ship_date')
-copy_col('ship_mode')
-copy_col('customer_id')
-copy_col('customer_name')
-copy_col('segment')
-copy_col('country')
-copy_col('city')
-copy_col('state')
-copy_col('region')
-copy_col('postal_code')
-copy_col('product_id')
-copy_col('product_name')
-copy_col('category')
-copy_col('sub_category')
-copy_col('sales')        # monetary value
-copy_col('quantity')
-copy_col('discount')
-copy_col('profit')
+# Build the working DataFrame with one projection + rename; logical columns that
+# were not found in the file are added as all-NaN by the reindex
+present = {logical: actual for logical, actual in col_map.items() if actual is not None}
+work = (
+    df[list(present.values())]
+    .rename(columns={actual: logical for logical, actual in present.items()})
+    .reindex(columns=list(expected_candidates))
+)
+
+# low-cardinality text columns (and the id keys) as category so the
+# drop_duplicates / factorize steps below compare integer codes, not strings
+for catcol in ['segment', 'region', 'country', 'category', 'sub_category',
+               'ship_mode', 'state', 'city', 'customer_id', 'product_id']:
+    if catcol in work.columns:
+        work[catcol] = work[catcol].astype('category')
 
 # If order_date is not parsed as datetime, attempt parsing
 if not pd.api.types.is_datetime64_any_dtype(work['order_date']):
@@ -127,19 +121,26 @@ if not pd.api.types.is_datetime64_any_dtype(work['order_date']):
 if not pd.api.types.is_datetime64_any_dtype(work['ship_date']):
     work['ship_date'] = pd.to_datetime(work['ship_date'], errors='coerce')
 
-# Convert numeric columns
+# Convert numeric columns (already typed when read from Excel/Parquet)
 for numcol in ['sales', 'quantity', 'discount', 'profit']:
-    if numcol in work.columns:
+    if numcol in work.columns and not pd.api.types.is_numeric_dtype(work[numcol]):
         work[numcol] = pd.to_numeric(work[numcol], errors='coerce')
 
 # Drop rows where critical keys are missing (order_id or customer_id or product_id or order_date)
+# and rows with zero or negative quantity, using one combined mask
 initial_shape = work.shape
-work = work.dropna(subset=['order_id', 'customer_id', 'product_id', 'order_date'])
-print(f"Dropped rows missing critical keys: from {initial_shape} -> {work.shape}")
+keep = (
+    work[['order_id', 'customer_id', 'product_id', 'order_date']].notna().all(axis=1).to_numpy()
+    & (np.nan_to_num(work['quantity'].to_numpy(dtype=float), nan=0.0) > 0)
+)
+work = work.loc[keep].reset_index(drop=True)
+log.info("Dropped rows missing critical keys or quantity: from %s -> %s", initial_shape, work.shape)
 
-# remove rows with zero or negative quantity
-if 'quantity' in work.columns:
-    work = work[work['quantity'].fillna(0) > 0]
+# downcast quantity to the smallest integer type that holds it; to_numeric
+# leaves it as is when the values are not integral, so nothing is truncated
+# or wrapped. The monetary columns stay float64 because profit carries 4
+# decimals on values in the thousands, more than float32's ~7 significant digits
+work['quantity'] = pd.to_numeric(work['quantity'], downcast='integer')
 
 # ==============
 # 3. DIMENSIONS
@@ -166,45 +167,43 @@ dim_product = work[[
 min_date = work['order_date'].min()
 max_date = work['order_date'].max()
 date_range = pd.date_range(start=min_date, end=max_date, freq='D')
-dim_date = pd.DataFrame({'date': date_range})
-dim_date['date_key'] = dim_date['date'].dt.strftime('%Y%m%d').astype(int)
-dim_date['day'] = dim_date['date'].dt.day
-dim_date['month'] = dim_date['date'].dt.month
-dim_date['month_name'] = dim_date['date'].dt.strftime('%b')
-dim_date['year'] = dim_date['date'].dt.year
-dim_date['quarter'] = dim_date['date'].dt.quarter
-dim_date['day_of_week'] = dim_date['date'].dt.dayofweek
-dim_date['day_name'] = dim_date['date'].dt.day_name()
-dim_date['is_weekend'] = dim_date['day_of_week'].isin([5,6]).astype(int)
+# compute each calendar field once from the DatetimeIndex and build the frame in one go
+di = pd.DatetimeIndex(date_range)
+yr, mo, day = di.year.to_numpy(), di.month.to_numpy(), di.day.to_numpy()
+dow = di.dayofweek.to_numpy()
+dim_date = pd.DataFrame({
+    'date': di,
+    'date_key': yr * 10000 + mo * 100 + day,
+    'day': day,
+    'month': mo,
+    'month_name': di.strftime('%b'),
+    'year': yr,
+    'quarter': (mo - 1) // 3 + 1,
+    'day_of_week': dow,
+    'day_name': di.day_name(),
+    'is_weekend': (dow >= 5).astype(np.int8)
+})
 
 # ==============
 # 4. FACT TABLE
 # ==============
-fact_sales = work.copy()
+# project only the fact columns out of work (column selection already
+# returns a new frame, so no explicit .copy() of the whole working set)
+fact_source_cols = [
+    'order_id', 'order_date', 'ship_date', 'ship_mode',
+    'customer_id', 'product_id',
+    'country', 'city', 'state', 'region',
+    'quantity', 'sales', 'discount', 'profit'
+]
+fact_sales = work[fact_source_cols].rename(columns={'sales': 'sales_amount'}).reset_index(drop=True)
 
-# make a consistent order_date_key
-fact_sales['order_date_key'] = fact_sales['order_date'].dt.strftime('%Y%m%d').astype(int)
-
-# rename to standard names
-fact_sales = fact_sales.rename(columns={
-    'order_id': 'order_id',
-    'order_date': 'order_date',
-    'ship_date': 'ship_date',
-    'ship_mode': 'ship_mode',
-    'customer_id': 'customer_id',
-    'product_id': 'product_id',
-    'country': 'country',
-    'city': 'city',
-    'state': 'state',
-    'region': 'region',
-    'quantity': 'quantity',
-    'sales': 'sales_amount',
-    'discount': 'discount',
-    'profit': 'profit'
-})
+# make a consistent order_date_key (YYYYMMDD fits in int32)
+_dt = fact_sales['order_date'].dt
+fact_sales['year'] = _dt.year
+fact_sales['month'] = _dt.month
+fact_sales['order_date_key'] = (fact_sales['year'] * 10000 + fact_sales['month'] * 100 + _dt.day).astype(np.int32)
 
 # surrogate primary key for fact
-fact_sales = fact_sales.reset_index(drop=True)
 fact_sales['sales_id'] = fact_sales.index + 1
 
 # derived fields
@@ -222,15 +221,16 @@ keep_cols = [
     'customer_id', 'product_id',
     'country', 'city', 'state', 'region',
     'quantity', 'sales_amount', 'gross_sales',
-    'discount', 'discount_pct', 'profit'
+    'discount', 'discount_pct', 'profit',
+    'year', 'month'
 ]
 
 # filter to existing columns
 keep_existing = [c for c in keep_cols if c in fact_sales.columns]
-fact_sales = fact_sales[keep_existing].copy()
+fact_sales = fact_sales[keep_existing]
 
-print("Final fact_sales shape:", fact_sales.shape)
-print("fact_sales columns:", fact_sales.columns.tolist())
+log.info("Final fact_sales shape: %s", fact_sales.shape)
+log.info("fact_sales columns: %s", fact_sales.columns.tolist())
 
 # ==============
 # 5. DERIVED METRICS
@@ -239,14 +239,42 @@ print("fact_sales columns:", fact_sales.columns.tolist())
 # ensure order_id exists in fact_sales for counting; if not, use sales_id for counts
 order_id_col = 'order_id' if 'order_id' in fact_sales.columns else 'sales_id'
 
-customer_metrics = fact_sales.groupby('customer_id').agg(
-    total_revenue=('sales_amount', 'sum'),
-    total_profit=('profit', 'sum'),
-    total_orders=(order_id_col, 'nunique' if order_id_col in fact_sales.columns else 'count'),
-    total_quantity=('quantity', 'sum'),
-    first_order_date=('order_date', 'min'),
-    last_order_date=('order_date', 'max')
-).reset_index()
+# factorize customer_id once; every customer_metrics reduction below is keyed
+# by these integer codes
+cust_codes, cust_uniques = pd.factorize(fact_sales['customer_id'], sort=True)
+n_cust = len(cust_uniques)
+
+# distinct values per group: pack (group, value) code pairs into one int64,
+# dedupe them with np.unique and count the survivors per group; NaN values
+# (factorize code -1) are left out, as nunique does
+def grouped_nunique(group_codes, n_groups, values):
+    value_codes, value_uniques = pd.factorize(values)
+    valid = value_codes >= 0
+    n_values = max(len(value_uniques), 1)
+    packed = group_codes[valid].astype(np.int64) * n_values + value_codes[valid]
+    return np.bincount(np.unique(packed) // n_values, minlength=n_groups)
+
+# the sums stay on pandas (grouped by the integer codes) for its compensated
+# summation; plain np.bincount adds float noise such as 277.3824000000001
+totals = fact_sales.groupby(cust_codes)[['sales_amount', 'profit', 'quantity']].sum()
+
+# order dates as int64 ticks in the column's own unit (ns, us, ...)
+order_dates = fact_sales['order_date'].to_numpy()
+order_ticks = order_dates.view('i8')
+first_ticks = np.full(n_cust, np.iinfo(np.int64).max, dtype=np.int64)
+last_ticks = np.full(n_cust, np.iinfo(np.int64).min, dtype=np.int64)
+np.minimum.at(first_ticks, cust_codes, order_ticks)
+np.maximum.at(last_ticks, cust_codes, order_ticks)
+
+customer_metrics = pd.DataFrame({
+    'customer_id': cust_uniques,
+    'total_revenue': totals['sales_amount'].to_numpy(),
+    'total_profit': totals['profit'].to_numpy(),
+    'total_orders': grouped_nunique(cust_codes, n_cust, fact_sales[order_id_col]),
+    'total_quantity': totals['quantity'].to_numpy(),
+    'first_order_date': first_ticks.view(order_dates.dtype),
+    'last_order_date': last_ticks.view(order_dates.dtype)
+})
 
 max_order_date = fact_sales['order_date'].max() if 'order_date' in fact_sales.columns else pd.Timestamp.now()
 customer_metrics['days_since_last_order'] = (max_order_date - customer_metrics['last_order_date']).dt.days
@@ -258,17 +286,11 @@ customer_metrics['avg_order_value'] = np.where(
 
 # RFM-like scoring (simple)
 def score_from_quantiles(series):
-    q = series.quantile([0.25, 0.5, 0.75]).to_dict()
-    def scorer(x):
-        if x <= q[0.25]:
-            return 1
-        elif x <= q[0.50]:
-            return 2
-        elif x <= q[0.75]:
-            return 3
-        else:
-            return 4
-    return series.apply(scorer)
+    # bucket 1..4 by quartile; side='left' keeps values equal to a cut-off
+    # in the lower bucket (x <= q25 -> 1, x <= q50 -> 2, ...)
+    qs = series.quantile([0.25, 0.5, 0.75]).to_numpy()
+    scores = np.searchsorted(qs, series.to_numpy(), side='left') + 1
+    return pd.Series(scores, index=series.index)
 
 # Recency = days_since_last_order (lower better -> invert)
 if 'days_since_last_order' in customer_metrics.columns:
@@ -279,17 +301,27 @@ else:
 
 customer_metrics['F'] = score_from_quantiles(customer_metrics['total_orders'])
 customer_metrics['M'] = score_from_quantiles(customer_metrics['total_revenue'])
-customer_metrics['RFM_score'] = customer_metrics['R'].astype(str) + customer_metrics['F'].astype(str) + customer_metrics['M'].astype(str)
+# R, F and M are each 1-4, so R*100 + F*10 + M keeps the same three digits
+# as the old string concatenation ("114" -> 114) without per-row strings
+customer_metrics['RFM_score'] = (
+    customer_metrics['R'].astype(np.int16) * 100
+    + customer_metrics['F'].astype(np.int16) * 10
+    + customer_metrics['M'].astype(np.int16)
+)
 
 # monthly_sales
 if 'order_date' in fact_sales.columns and 'sales_amount' in fact_sales.columns:
-    fact_sales['year'] = fact_sales['order_date'].dt.year
-    fact_sales['month'] = fact_sales['order_date'].dt.month
-    monthly_sales = fact_sales.groupby(['year', 'month']).agg(
+    # single int32 year*100+month key: one-column groupby, already sorted
+    ym = (fact_sales['year'] * 100 + fact_sales['month']).astype(np.int32).rename('ym')
+    monthly_sales = fact_sales.groupby(ym, sort=True).agg(
         monthly_revenue=('sales_amount', 'sum'),
-        monthly_profit=('profit', 'sum') if 'profit' in fact_sales.columns else ('sales_amount', 'sum'),
-        total_orders=(order_id_col, 'nunique' if order_id_col in fact_sales.columns else 'count')
-    ).reset_index().sort_values(['year', 'month'])
+        monthly_profit=('profit', 'sum') if 'profit' in fact_sales.columns else ('sales_amount', 'sum')
+    ).reset_index()
+    ym_codes, ym_uniques = pd.factorize(ym, sort=True)
+    monthly_sales['total_orders'] = grouped_nunique(ym_codes, len(ym_uniques), fact_sales[order_id_col])
+    monthly_sales.insert(0, 'year', monthly_sales['ym'] // 100)
+    monthly_sales.insert(1, 'month', monthly_sales['ym'] % 100)
+    monthly_sales = monthly_sales.drop(columns='ym')
     monthly_sales['cumulative_revenue'] = monthly_sales['monthly_revenue'].cumsum()
 else:
     monthly_sales = pd.DataFrame()
@@ -297,29 +329,59 @@ else:
 # ==============
 # 6. WRITE TO SQLITE
 # ==============
-engine = create_engine(f"sqlite:///{DB_PATH}", echo=False)
+# one raw sqlite3 connection, WAL journal and a single transaction for all
+# tables instead of six separate SQLAlchemy to_sql round-trips
+conn = sqlite3.connect(DB_PATH, isolation_level=None)
+conn.executescript(
+    "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; "
+    "PRAGMA temp_store=MEMORY; PRAGMA cache_size=-200000;"
+)
+
+def sqlite_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "FLOAT"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "DATETIME"
+    return "TEXT"
+
+def sqlite_rows(df_obj):
+    # datetimes are stored as text in the same layout SQLAlchemy used;
+    # SQLite itself stores NaN (and so NaT after strftime) as NULL
+    date_cols = [c for c in df_obj.columns if pd.api.types.is_datetime64_any_dtype(df_obj[c])]
+    if date_cols:
+        df_obj = df_obj.assign(**{
+            c: df_obj[c].dt.strftime('%Y-%m-%d %H:%M:%S.%f') for c in date_cols
+        })
+    return df_obj.itertuples(index=False, name=None)
 
 # safe write if frame is not empty
 def to_sql_safe(df_obj, name):
     if df_obj is None:
         return
+    table = TABLE_PREFIX + name
     if isinstance(df_obj, pd.DataFrame) and not df_obj.empty:
-        df_obj.to_sql(TABLE_PREFIX + name, engine, if_exists='replace', index=False)
-        print(f"Written table: {TABLE_PREFIX + name} shape: {df_obj.shape}")
+        col_defs = ", ".join(f'"{c}" {sqlite_type(t)}' for c, t in df_obj.dtypes.items())
+        qmarks = ", ".join("?" * len(df_obj.columns))
+        conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        conn.execute(f'CREATE TABLE "{table}" ({col_defs})')
+        conn.executemany(f'INSERT INTO "{table}" VALUES ({qmarks})', sqlite_rows(df_obj))
+        log.info("Written table: %s shape: %s", table, df_obj.shape)
     else:
-        print(f"Skipped writing table {TABLE_PREFIX + name} (empty or invalid)")
+        log.warning("Skipped writing table %s (empty or invalid)", table)
 
+conn.execute("BEGIN")
 to_sql_safe(dim_customer, "dim_customer")
 to_sql_safe(dim_product, "dim_product")
 to_sql_safe(dim_date, "dim_date")
 to_sql_safe(fact_sales, "fact_sales")
 to_sql_safe(customer_metrics, "customer_metrics")
 to_sql_safe(monthly_sales, "monthly_sales")
+conn.execute("COMMIT")
 
-print("All done. DB path:", DB_PATH.resolve())
-print("Available tables:")
-from sqlalchemy import text
-
-with engine.connect() as conn:
-    result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table';"))
-    print(result.fetchall())
+log.info("All done. DB path: %s", DB_PATH.resolve())
+if log.isEnabledFor(logging.INFO):
+    result = conn.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    log.info("Available tables: %s", result.fetchall())
+conn.close()